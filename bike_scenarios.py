@@ -7,11 +7,14 @@
 # - Add new part helper: --add-part (prompts and appends to parts.csv)
 # - Saves JSON + Markdown + CSV reports
 
-import os, sys, csv, json, glob, datetime
-from typing import Dict, List
+import os, sys, re, csv, json, pickle, datetime, functools
+from operator import itemgetter
+from typing import Dict, List, Tuple
 
 BASE = os.path.dirname(os.path.abspath(__file__))
 PARTS_CSV = os.path.join(BASE, "parts.csv")
+# Bump when the shape of cached rows/categories changes
+CACHE_VERSION = 6
 SCEN_DIR = os.path.join(BASE, "scenarios")
 REPORT_DIR = os.path.join(BASE, "reports")
 os.makedirs(SCEN_DIR, exist_ok=True)
@@ -35,13 +38,34 @@ REQUIRED_CATEGORIES = [
     "Saddle","Pedals","ThruAxles"
 ]
 
+# "key: value" lines of a simple scenario YAML; lines starting with # are comments
+YAML_LINE_RE = re.compile(r"^(?![ \t]*#)([^:\n]*):(.*)$", re.M)
+
 def load_parts(path: str) -> List[dict]:
+    # Plain csv.reader + zip: same rows as DictReader without its per-row
+    # Python-level bookkeeping
     parts = []
     with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return parts
+        n = len(header)
+        for values in reader:
+            if not values:
+                continue
+            if len(values) < n:
+                values += [None] * (n - len(values))
+            row = dict(zip(header, values))
+            # Repeated text columns share one string object per distinct value
+            for k in ("category", "brand", "model", "variant"):
+                row[k] = sys.intern(row.get(k) or "")
             row["weight_g"] = float(row.get("weight_g",0) or 0)
             row["price_sgd"] = float(row.get("price_sgd",0) or 0)
+            # Lowercased search text, built once instead of on every search
+            row["_search"] = (row["brand"]+" "+row["model"]+" "+(row.get("variant") or "")).lower()
+            # Option line shown by the pickers; parts don't change after load
+            row["_display"] = f"{row['brand']} {row['model']}  [{row.get('variant','')}]  {row['weight_g']:.0f} g  ${row['price_sgd']:.0f}"
             parts.append(row)
     return parts
 
@@ -51,7 +75,45 @@ def group_by_category(parts: List[dict]) -> Dict[str, List[dict]]:
         cats.setdefault(p["category"], []).append(p)
     for k in cats:
         cats[k].sort(key=lambda x: (x["brand"], x["model"]))
-    return cats
+    # Categories come back in sorted order so callers can iterate cats directly
+    return {k: cats[k] for k in sorted(cats)}
+
+def load_categories(path: str, use_cache: bool = True) -> Tuple[Dict[str, List[dict]], Dict[str, Dict[str, dict]]]:
+    # (cats, name index) for the CSV. Memoized per process and pickled next
+    # to the CSV, both keyed on its mtime + size, so repeat runs skip
+    # CSV parsing and index building entirely.
+    st = os.stat(path)
+    return _load_categories_cached(path, st.st_mtime_ns, st.st_size, use_cache)
+
+@functools.lru_cache(maxsize=8)
+def _load_categories_cached(path: str, mtime_ns: int, size: int, use_cache: bool):
+    cache_path = path + ".idx.pkl"
+    key = (CACHE_VERSION, mtime_ns, size)
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                cached_key, cats, index = pickle.load(f)
+            if cached_key == key:
+                return cats, index
+        except (OSError, EOFError, TypeError, ValueError, pickle.UnpicklingError):
+            pass
+    cats = group_by_category(load_parts(path))
+    index = index_by_name(cats)
+    if use_cache and cats:
+        try:
+            with open(cache_path, "wb") as f:
+                pickle.dump((key, cats, index), f, protocol=5)
+        except OSError:
+            pass  # read-only checkout: just run uncached
+    return cats, index
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
 
 def print_header():
     print(ANSI["bold"] + "Bike Scenario Planner" + ANSI["reset"])
@@ -59,7 +121,7 @@ def print_header():
     print()
 
 def list_categories(cats: Dict[str, List[dict]]):
-    for i, k in enumerate(sorted(cats.keys()), 1):
+    for i, k in enumerate(cats, 1):
         print(f"  {i}. {k} ({len(cats[k])} options)")
     print()
 
@@ -78,12 +140,11 @@ def choose_from_list(options, prompt="Choose # (or 's' to search, Enter to skip)
 
 def search_and_choose(options):
     q = input("  Search text (brand/model/variant): ").strip().lower()
-    filtered = [o for o in options if q in (o["brand"]+" "+o["model"]+" "+(o.get("variant") or "")).lower()]
+    filtered = [o for o in options if q in o["_search"]]
     if not filtered:
         print("  No match.")
         return None
-    for i, o in enumerate(filtered, 1):
-        print(f"    {i}. {o['brand']} {o['model']}  [{o.get('variant','')}]  {o['weight_g']:.0f} g  ${o['price_sgd']:.0f}")
+    sys.stdout.write("".join(f"    {i}. {o['_display']}\n" for i, o in enumerate(filtered, 1)))
     while True:
         sel = input("  Pick # from results, or Enter to cancel: ").strip()
         if sel == "":
@@ -96,8 +157,8 @@ def search_and_choose(options):
 
 def pick_for_category(cat_name, options, preselect=None):
     print(ANSI["cyan"] + f"\nCategory: {cat_name}" + ANSI["reset"])
-    for i, o in enumerate(options, 1):
-        print(f"  {i}. {o['brand']} {o['model']}  [{o.get('variant','')}]  {o['weight_g']:.0f} g  ${o['price_sgd']:.0f}")
+    # One write for the whole listing rather than a print() per option
+    sys.stdout.write("".join(f"  {i}. {o['_display']}\n" for i, o in enumerate(options, 1)))
     if preselect:
         print(f"  (Press Enter to keep current: {preselect['brand']} {preselect['model']})")
     while True:
@@ -110,79 +171,113 @@ def pick_for_category(cat_name, options, preselect=None):
             return preselect
         return choice  # may be None (skip)
 
-def summarize(picks):
-    total_w = sum(p["weight_g"] for p in picks.values() if p)
-    total_p = sum(p["price_sgd"] for p in picks.values() if p)
+get_weight = itemgetter("weight_g")
+get_price = itemgetter("price_sgd")
+
+def compute_totals(picks):
+    chosen = [p for p in picks.values() if p]
+    # Plain left-to-right sum, same as the running totals in the pick loop
+    return sum(map(get_weight, chosen)), sum(map(get_price, chosen))
+
+def print_totals(total_w, total_p):
     print(ANSI["green"] + f"\nCurrent totals: {total_w:.0f} g,  ${total_p:.0f} SGD" + ANSI["reset"])
+
+def summarize(picks):
+    total_w, total_p = compute_totals(picks)
+    print_totals(total_w, total_p)
     return total_w, total_p
 
+def public_fields(part: dict) -> dict:
+    # Drop derived "_" keys (search text etc.) before writing a part out
+    return {k: v for k, v in part.items() if not k.startswith("_")}
+
 def save_scenario(name, picks, totals):
+    # Selected parts, collected once and shared by the JSON, Markdown and CSV outputs
+    active = [(k, v) for k, v in picks.items() if v]
     data = {
         "name": name,
         "created": datetime.datetime.now().isoformat(timespec="seconds"),
-        "picks": {k: v for k, v in picks.items() if v},
+        "picks": {k: public_fields(v) for k, v in active},
         "total_weight_g": totals[0],
         "total_price_sgd": totals[1],
     }
     path = os.path.join(SCEN_DIR, f"{name}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    write_json(path, data)
     # Export Markdown
-    md = ["# Scenario: " + name, "", "| Category | Brand | Model | Variant | Weight (g) | Price (SGD) |",
-          "|---|---|---|---|---:|---:|"]
-    for cat, v in data["picks"].items():
-        md.append(f"| {cat} | {v['brand']} | {v['model']} | {v.get('variant','')} | {v['weight_g']:.0f} | {v['price_sgd']:.0f} |")
-    md.append(f"\n**Totals:** {data['total_weight_g']:.0f} g,  ${data['total_price_sgd']:.0f} SGD\n")
+    md = "\n".join([
+        "# Scenario: " + name, "", "| Category | Brand | Model | Variant | Weight (g) | Price (SGD) |",
+        "|---|---|---|---|---:|---:|",
+        *(f"| {cat} | {v['brand']} | {v['model']} | {v.get('variant','')} | {v['weight_g']:.0f} | {v['price_sgd']:.0f} |"
+          for cat, v in active),
+        f"\n**Totals:** {totals[0]:.0f} g,  ${totals[1]:.0f} SGD\n",
+    ])
     with open(os.path.join(REPORT_DIR, f"{name}.md"), "w", encoding="utf-8") as f:
-        f.write("\n".join(md))
+        f.write(md)
     # Export CSV
     csv_path = os.path.join(REPORT_DIR, f"{name}.csv")
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["category","brand","model","variant","weight_g","price_sgd"])
-        for cat, v in data["picks"].items():
-            w.writerow([cat, v["brand"], v["model"], v.get("variant",""), int(v["weight_g"]), v["price_sgd"]])
+        w.writerows((cat, v["brand"], v["model"], v.get("variant",""), int(v["weight_g"]), v["price_sgd"])
+                    for cat, v in active)
     return path
 
 def load_last_scenario():
-    files = sorted(glob.glob(os.path.join(SCEN_DIR, "*.json")), key=os.path.getmtime)
-    if not files:
+    # One scandir pass: name and mtime come from the directory entry
+    path, best_mt = None, -1
+    with os.scandir(SCEN_DIR) as it:
+        for e in it:
+            if e.name.endswith(".json") and not e.name.startswith(".") and e.is_file():
+                mt = e.stat().st_mtime
+                if mt > best_mt:
+                    best_mt, path = mt, e.path
+    if not path:
         return None
-    with open(files[-1], "r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(path)
 
 def parse_simple_yaml(path):
+    # Memoized per process on (path, mtime, size), like load_categories
+    st = os.stat(path)
+    return dict(_parse_simple_yaml_cached(path, st.st_mtime_ns, st.st_size))
+
+@functools.lru_cache(maxsize=32)
+def _parse_simple_yaml_cached(path, mtime_ns, size):
     # Minimal YAML mapping parser: category: model (one per line)
     # Ignores comments (# ...). Values are a single line string.
-    mapping = {}
     with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"): 
-                continue
-            if ":" in line:
-                k, v = line.split(":", 1)
-                k = k.strip()
-                v = v.strip().strip('"\'')
-                mapping[k] = v
-    return mapping
-
-def apply_scenario_mapping(mapping, cats):
+        data = f.read()
+    return {k.strip(): v.strip().strip('"\'') for k, v in YAML_LINE_RE.findall(data)}
+
+# Scenario file readers by extension; anything else is read as simple YAML
+SCENARIO_LOADERS = {".json": read_json, ".yaml": parse_simple_yaml, ".yml": parse_simple_yaml}
+
+def load_scenario_file(path):
+    return SCENARIO_LOADERS.get(os.path.splitext(path)[1].lower(), parse_simple_yaml)(path)
+
+def index_by_name(cats: Dict[str, List[dict]]) -> Dict[str, Dict[str, dict]]:
+    # category -> {lowercased "model" and "brand model": part}
+    # Filled back to front so the first matching option wins, as in a linear scan.
+    index = {}
+    for cat, options in cats.items():
+        lookup = {}
+        for o in reversed(options):
+            lookup[(o["brand"]+" "+o["model"]).lower()] = o
+            lookup[o["model"].lower()] = o
+        index[cat] = lookup
+    return index
+
+def apply_scenario_mapping(mapping, cats, index=None):
     # mapping: {category: model}
+    if index is None:
+        index = index_by_name(cats)
     picks = {}
-    for cat in sorted(cats.keys()):
+    for cat in cats:
         want = mapping.get(cat)
         if not want:
             picks[cat] = None
             continue
-        # find by exact model name (brand-agnostic)
-        options = cats[cat]
-        chosen = None
-        for o in options:
-            if o["model"].lower() == want.lower() or (o["brand"]+" "+o["model"]).lower() == want.lower():
-                chosen = o
-                break
-        picks[cat] = chosen
+        # find by exact model name (brand-agnostic) or "brand model"
+        picks[cat] = index[cat].get(want.lower())
     return picks
 
 def check_completeness(picks, cats):
@@ -199,8 +294,7 @@ def check_completeness(picks, cats):
                 print(f"  - {c}: e.g., {o['brand']} {o['model']} [{o.get('variant','')}] {o['weight_g']:.0f} g ${o['price_sgd']:.0f}")
             else:
                 print(f"  - {c}: (no options in database yet)")
-    total_w = sum(p["weight_g"] for p in picks.values() if p)
-    total_p = sum(p["price_sgd"] for p in picks.values() if p)
+    total_w, total_p = compute_totals(picks)
     print(f"Current subtotal (selected only): {total_w:.0f} g, ${total_p:.0f} SGD")
 
 def add_part_interactive():
@@ -216,7 +310,7 @@ def add_part_interactive():
         ("source", "Source/store (optional): "),
         ("link", "Link (optional): ")
     ]
-    row = {}
+    row = []
     for key, prompt in fields:
         val = input(prompt).strip()
         if key in ("weight_g", "price_sgd"):
@@ -224,12 +318,12 @@ def add_part_interactive():
                 val = float(val)
             except:
                 val = 0.0
-        row[key] = val
-    exists = os.path.exists(PARTS_CSV)
+        row.append(val)
+    # Append mode opens positioned at EOF: offset 0 means a new/empty file needing a header
     with open(PARTS_CSV, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["category","brand","model","variant","weight_g","price_sgd","notes","source","link"])
-        if not exists:
-            w.writeheader()
+        w = csv.writer(f)
+        if f.tell() == 0:
+            w.writerow([key for key, _ in fields])
         w.writerow(row)
     print(ANSI["green"] + "Added to parts.csv" + ANSI["reset"])
 
@@ -243,24 +337,17 @@ def main():
         add_part_interactive()
         return
 
-    parts = load_parts(PARTS_CSV)
-    if not parts:
+    cats, index = load_categories(PARTS_CSV, use_cache="--no-cache" not in flags)
+    if not cats:
         print("No parts found in parts.csv")
         return
-    cats = group_by_category(parts)
 
     # Non-interactive from scenario file
     scen_file = values.get("--scenario")
     if scen_file:
-        mapping = {}
-        if scen_file.lower().endswith(".json"):
-            with open(scen_file, "r", encoding="utf-8") as f:
-                mapping = json.load(f)
-        else:
-            mapping = parse_simple_yaml(scen_file)
-        picks = apply_scenario_mapping(mapping, cats)
-        total_w = sum(p["weight_g"] for p in picks.values() if p)
-        total_p = sum(p["price_sgd"] for p in picks.values() if p)
+        mapping = load_scenario_file(scen_file)
+        picks = apply_scenario_mapping(mapping, cats, index)
+        total_w, total_p = compute_totals(picks)
         name = os.path.splitext(os.path.basename(scen_file))[0]
         print(f"Scenario from file: {name}")
         for cat, v in picks.items():
@@ -274,14 +361,12 @@ def main():
     # Completeness checker for a file
     check_file = values.get("--check-scenario")
     if check_file:
-        mapping = {}
-        if check_file.lower().endswith(".json"):
-            with open(check_file, "r", encoding="utf-8") as f:
-                mapping = json.load(f)
-            mapping = mapping.get("picks", mapping)
-        else:
-            mapping = parse_simple_yaml(check_file)
-        picks = apply_scenario_mapping(mapping, cats)
+        mapping = load_scenario_file(check_file)
+        # saved scenario JSON nests whole parts under "picks"; match them by "brand model"
+        if isinstance(mapping.get("picks"), dict):
+            mapping = {cat: f"{v['brand']} {v['model']}" if isinstance(v, dict) else v
+                       for cat, v in mapping["picks"].items()}
+        picks = apply_scenario_mapping(mapping, cats, index)
         check_completeness(picks, cats)
         return
 
@@ -309,11 +394,16 @@ def main():
                         hit = o; break
             preselect_objs[cat] = hit
 
-    picks = {k: None for k in sorted(cats.keys())}
-    for cat in sorted(cats.keys()):
+    picks = {}
+    # Running totals, updated per pick instead of re-summing every category
+    total_w = total_p = 0.0
+    for cat in cats:
         choice = pick_for_category(cat, cats[cat], preselect=preselect_objs.get(cat))
+        if choice:
+            total_w += choice["weight_g"]
+            total_p += choice["price_sgd"]
         picks[cat] = choice
-        summarize(picks)
+        print_totals(total_w, total_p)
 
     # Completeness feedback
     print()